@@ -127,7 +127,8 @@ def runTask(task, database):
         logger.error("Task %s not recognized" % task.name)
         task.status = "Failed"
         task.processid = None
-        task.save(using=database)
+        task.save(update_fields=["started", "status", "processid"], using=database)
+        return task.status
     else:
         # Close all database connections to assure the parent and child
         # process don't share them.
@@ -160,14 +161,14 @@ def runTask(task, database):
         child.join()
 
         # Read the task again from the database and update it
-        task = Task.objects.all().using(database).get(pk=task.id)
+        now = datetime.now()
+        task.refresh_from_db(using=database)
         task.processid = None
         if (
             task.status not in ("Done", "Failed")
             or not task.finished
             or not task.started
         ):
-            now = datetime.now()
             if not task.started:
                 task.started = now
             if not background:
@@ -175,7 +176,10 @@ def runTask(task, database):
                     task.finished = now
                 if task.status not in ("Done", "Failed"):
                     task.status = "Done"
-            task.save(using=database)
+            task.save(
+                update_fields=["started", "finished", "status", "processid"],
+                using=database,
+            )
         if "FREPPLE_TEST" not in os.environ:
             logger.info(
                 "Worker %s for database '%s' finished task %d at %s: success"
@@ -183,9 +187,10 @@ def runTask(task, database):
                     os.getpid(),
                     settings.DATABASES[database]["NAME"],
                     task.id,
-                    datetime.now(),
+                    now,
                 )
             )
+        return task.status
 
 
 class Command(BaseCommand):
@@ -291,7 +296,10 @@ class Command(BaseCommand):
                     task.started = now
                 task.finished = now
                 task.message = str(e)
-                task.save(using=database)
+                task.save(
+                    update_fields=["started", "finished", "status", "message"],
+                    using=database,
+                )
                 if "FREPPLE_TEST" not in os.environ:
                     logger.info(
                         "Worker %s for database '%s' finished task %d at %s: failed"
@@ -299,7 +307,7 @@ class Command(BaseCommand):
                             os.getpid(),
                             settings.DATABASES[database]["NAME"],
                             task.id,
-                            datetime.now(),
+                            now,
                         )
                     )
         # Remove the parameter again
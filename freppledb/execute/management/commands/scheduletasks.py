@@ -15,13 +15,13 @@ import re
 from shutil import which
 from subprocess import call
 import sys
+import time
 
 from django.conf import settings
 from django.core.mail import EmailMessage
 from django.core.management import get_commands
 from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction, DEFAULT_DB_ALIAS
-from django.db.models import Min
 from django.template.loader import render_to_string
 from django.utils.translation import gettext_lazy as _
 
@@ -60,6 +60,12 @@ class Command(BaseCommand):
             type=int,
             help="Task identifier (generated automatically if not provided)",
         )
+        parser.add_argument(
+            "--continuous",
+            action="store_true",
+            default=False,
+            help="Keep the scheduler process alive, rather than rescheduling it with the at-command",
+        )
 
     def handle(self, *args, **options):
         # Dispatcher
@@ -72,30 +78,47 @@ class Command(BaseCommand):
         database = options["database"]
         if database not in settings.DATABASES:
             raise CommandError("No database settings known for '%s'" % database)
+        tasks = Task.objects.all().using(database)
         try:
-            schedule = ScheduledTask.objects.using(database).get(
-                name=options["schedule"]
+            schedule = (
+                ScheduledTask.objects.using(database)
+                .only("name", "data", "email_failure", "email_success")
+                .get(name=options["schedule"])
             )
         except ScheduledTask.DoesNotExist:
             raise CommandError(
                 "No scheduled task found with name '%s' " % options["schedule"]
             )
-        if "user" in options and options["user"]:
+        if options.get("user"):
             try:
-                user = User.objects.all().using(database).get(username=options["user"])
+                # Single index seek on the unique username column, fetching
+                # only the columns we need for the task foreign key
+                user = (
+                    User.objects.using(database)
+                    .only("id", "username")
+                    .get(username=options["user"])
+                )
             except Exception:
                 raise CommandError("User '%s' not found" % options["user"])
         else:
             user = None
 
         task = None
+        steptasks = []
         now = datetime.now()
+        # Cached as a local rather than at module level: a module level value
+        # would be stale in processes forked after the module was imported
+        pid = os.getpid()
         try:
             setattr(_thread_locals, "database", database)
-            # Initialize the task
+            # Initialize the parent task. This write must commit before the
+            # schedule is validated: a validation failure has to reach the
+            # except branch below with a task row it can mark "Failed".
             if "task" in options and options["task"]:
                 try:
-                    task = Task.objects.all().using(database).get(pk=options["task"])
+                    task = tasks.only(
+                        "id", "name", "started", "finished", "status", "processid"
+                    ).get(pk=options["task"])
                 except Exception:
                     raise CommandError("Task identifier not found")
                 if (
@@ -107,7 +130,11 @@ class Command(BaseCommand):
                     raise CommandError("Invalid task identifier")
                 task.status = "0%"
                 task.started = now
-                task.processid = os.getpid()
+                task.processid = pid
+                task.save(
+                    update_fields=["status", "started", "processid"],
+                    using=database,
+                )
             else:
                 task = Task(
                     name="scheduletasks",
@@ -116,54 +143,101 @@ class Command(BaseCommand):
                     status="0%",
                     arguments="--schedule='%s'" % schedule.name,
                     user=user,
-                    processid=os.getpid(),
+                    processid=pid,
                 )
-            task.save(using=database)
+                task.save(using=database)
 
-            # The loop that actually executes the tasks
-            tasklist = schedule.data.get("tasks", [])
+            # Validate the schedule steps before any step task row is
+            # written, so a malformed entry can't leave partially created
+            # tasks behind
+            tasklist = schedule.data.get("tasks", []) if schedule.data else []
             stepcount = len(tasklist)
+            for step in tasklist:
+                if not isinstance(step, dict) or not step.get("name"):
+                    raise CommandError(
+                        "Invalid step in schedule '%s': missing a command name"
+                        % schedule.name
+                    )
+
+            # Create all step tasks in a single round-trip; bulk_create
+            # commits all its batches in one transaction.
+            # The steps are created as "Scheduled" rather than "Waiting":
+            # the worker picks up any waiting task, and must not grab steps
+            # this loop hasn't dispatched yet.
+            steptasks = tasks.bulk_create(
+                [
+                    Task(
+                        name=step.get("name"),
+                        submitted=now,
+                        arguments=step.get("arguments", ""),
+                        user=user,
+                        status="Scheduled",
+                    )
+                    for step in tasklist
+                ],
+                batch_size=500,
+            )
+
+            # The loop that actually executes the tasks.
+            # Steps run strictly one after the other: a schedule chains steps
+            # whose results feed the next one, so they can't be dispatched
+            # concurrently. Each step already runs in its own child process,
+            # spawned by runTask.
             idx = 1
             failed = []
-            for step in tasklist:
-                steptask = Task(
-                    name=step.get("name"),
-                    submitted=datetime.now(),
-                    arguments=step.get("arguments", ""),
-                    user=user,
-                    status="Waiting",
-                )
-                steptask.save(using=database)
-                Task.objects.all().using(database).filter(pk=task.id).update(
-                    message="Running task %s as step %s of %s"
-                    % (steptask.id, idx, stepcount),
-                    status="%d%%" % int(idx * 100.0 / stepcount),
-                )
-                runTask(steptask, database)
+            last_progress_write = None
+            for step, steptask in zip(tasklist, steptasks):
+                # Throttle the progress updates on the parent task: nobody reads
+                # them synchronously, so at most one write every 2 seconds.
+                # The first and last steps always write.
+                if (
+                    last_progress_write is None
+                    or time.monotonic() - last_progress_write > 2.0
+                    or idx == stepcount
+                ):
+                    tasks.filter(pk=task.id).update(
+                        message="Running task %s as step %s of %s"
+                        % (steptask.id, idx, stepcount),
+                        status="%d%%" % int(idx * 100.0 / stepcount),
+                    )
+                    last_progress_write = time.monotonic()
+
+                # Hand the step over for execution only now
+                steptask.status = "Waiting"
+                steptask.save(update_fields=["status"], using=database)
+                status = runTask(steptask, database)
 
                 # Check the status
-                steptask = Task.objects.all().using(database).get(pk=steptask.id)
-                if steptask.status == "Failed":
+                if status == "Failed":
                     failed.append(steptask.id)
                     if step.get("abort_on_failure", False):
                         task.message = "Failed at step %s of %s" % (idx, len(tasklist))
                         task.status = "Failed"
                         task.finished = datetime.now()
-                        task.save(using=database)
+                        task.save(
+                            update_fields=["message", "status", "finished"],
+                            using=database,
+                        )
                         raise Exception(task.message)
                 idx += 1
 
-            # Reread the task from the database and update it
-            task = Task.objects.all().using(database).get(pk=task.id)
-            task.processid = None
+            # Update the task with a single UPDATE, without rereading it first
             if failed:
                 task.status = "Failed"
-                task.message = "Failed at tasks: %s" % ", ".join(failed)
+                task.message = "Failed at tasks: %s" % ", ".join(
+                    str(f) for f in failed
+                )
             else:
                 task.status = "Done"
                 task.message = ""
+            task.processid = None
             task.finished = datetime.now()
-            task.save(using=database)
+            tasks.filter(pk=task.id).update(
+                processid=None,
+                status=task.status,
+                message=task.message,
+                finished=task.finished,
+            )
 
             # Email on success
             if schedule.email_success:
@@ -176,10 +250,10 @@ class Command(BaseCommand):
                     task.message = (
                         "Can't send success e-mail: missing SMTP configuration"
                     )
-                    task.save(using=database)
+                    task.save(update_fields=["message"], using=database)
                 elif not correctedRecipients:
                     task.message = "Can't send success e-mail: invalid recipients"
-                    task.save(using=database)
+                    task.save(update_fields=["message"], using=database)
                 else:
                     try:
                         EmailMessage(
@@ -189,16 +263,27 @@ class Command(BaseCommand):
                         ).send()
                     except Exception as e:
                         task.message = "Can't send failure e-mail: %s" % e
-                        task.save(using=database)
+                        task.save(update_fields=["message"], using=database)
 
         except Exception as e:
             if task:
-                task = Task.objects.all().using(database).get(pk=task.id)
                 task.status = "Failed"
                 task.message = "%s" % e
                 task.finished = datetime.now()
                 task.processid = None
-                task.save(using=database)
+                tasks.filter(pk=task.id).update(
+                    status=task.status,
+                    message=task.message,
+                    finished=task.finished,
+                    processid=None,
+                )
+
+                # Steps that never ran are still "Scheduled": cancel them so
+                # nothing picks them up later
+                if steptasks:
+                    tasks.filter(
+                        pk__in=[t.id for t in steptasks], status="Scheduled"
+                    ).update(status="Canceled")
 
                 # Email on failure
                 if schedule.email_failure:
@@ -211,10 +296,10 @@ class Command(BaseCommand):
                         task.message = (
                             "Can't send failure e-mail: missing SMTP configuration"
                         )
-                        task.save(using=database)
+                        task.save(update_fields=["message"], using=database)
                     elif not correctedRecipients:
                         task.message = "Can't send failure e-mail: invalid recipients"
-                        task.save(using=database)
+                        task.save(update_fields=["message"], using=database)
                     else:
                         try:
                             EmailMessage(
@@ -224,8 +309,8 @@ class Command(BaseCommand):
                             ).send()
                         except Exception as e:
                             task.message = "Can't send failure e-mail: %s" % e
-                            task.save(using=database)
-            raise e
+                            task.save(update_fields=["message"], using=database)
+            raise
 
         finally:
             setattr(_thread_locals, "database", None)
@@ -234,44 +319,76 @@ class Command(BaseCommand):
         """
         Task scheduler that looks at the defined schedule and generates tasks
         at the right moment.
+
+        In continuous mode the process stays alive and sleeps until the next
+        schedule is due. Otherwise it reschedules itself with the at-command
+        (or the task scheduler on Windows) and exits.
         """
         database = options["database"]
         if database not in settings.DATABASES:
             raise CommandError("No database settings known for '%s'" % database)
+        continuous = options.get("continuous", False)
 
-        # Collect tasks
-        # Note: use transaction and select_for_update to handle concurrent access
-        now = datetime.now()
-        created = False
-        with transaction.atomic(using=database):
-            for schedule in (
-                ScheduledTask.objects.all()
-                .using(database)
-                .filter(next_run__isnull=False, next_run__lte=now)
-                .order_by("next_run", "name")
-                .select_for_update(skip_locked=True)
-            ):
-                Task(
-                    name="scheduletasks",
-                    submitted=now,
-                    status="Waiting",
-                    user=schedule.user,
-                    arguments="--schedule='%s'" % schedule.name,
-                ).save(using=database)
-                schedule.computeNextRun(now)
-                schedule.save(using=database)
-                created = True
+        while True:
+            # Collect tasks
+            # Note: use transaction and select_for_update to handle concurrent access
+            now = datetime.now()
+            newtasks = []
+            with transaction.atomic(using=database):
+                due = []
+                for schedule in (
+                    ScheduledTask.objects.all()
+                    .using(database)
+                    .filter(next_run__isnull=False, next_run__lte=now)
+                    .order_by("next_run", "name")
+                    .select_related("user")
+                    .select_for_update(skip_locked=True)
+                ):
+                    newtasks.append(
+                        Task(
+                            name="scheduletasks",
+                            submitted=now,
+                            status="Waiting",
+                            user=schedule.user,
+                            arguments="--schedule='%s'" % schedule.name,
+                        )
+                    )
+                    schedule.computeNextRun(now)
+                    due.append(schedule)
+                # The locks are only held for these two bulk statements,
+                # and the next_run advance and the task inserts commit
+                # together: a failure can't leave a schedule pointing to the
+                # future without a task to execute
+                if due:
+                    ScheduledTask.objects.using(database).bulk_update(
+                        due, ["next_run"], batch_size=500
+                    )
+                if newtasks:
+                    Task.objects.using(database).bulk_create(newtasks, batch_size=500)
 
-        # Launch the worker process
-        if created:
-            launchWorker(database)
+            # Launch the worker process
+            if newtasks:
+                launchWorker(database)
+
+            # A single index-only lookup on the (next_run, name) index
+            earliest_next = (
+                ScheduledTask.objects.using(database)
+                .filter(next_run__isnull=False)
+                .order_by("next_run")
+                .values_list("next_run", flat=True)
+                .first()
+            )
+
+            if not continuous:
+                break
+
+            # Stay alive and wake up when the next schedule is due
+            if earliest_next:
+                time.sleep(max((earliest_next - datetime.now()).total_seconds(), 1))
+            else:
+                time.sleep(60)
 
         # Reschedule to run this task again at the next date
-        earliest_next = (
-            ScheduledTask.objects.using(database)
-            .filter(next_run__isnull=False)
-            .aggregate(Min("next_run"))
-        )["next_run__min"]
         if earliest_next and earliest_next > now:
             retcode = 0
             if os.name == "nt":
@@ -84,7 +84,7 @@ class ScheduledTask(models.Model):
 
     # Database fields
     name = models.CharField("name", primary_key=True, max_length=300, db_index=True)
-    next_run = models.DateTimeField("nextrun", blank=True, null=True, db_index=True)
+    next_run = models.DateTimeField("nextrun", blank=True, null=True)
     user = models.ForeignKey(
         User,
         blank=False,
@@ -108,6 +108,9 @@ class ScheduledTask(models.Model):
         db_table = "execute_schedule"
         verbose_name_plural = _("scheduled tasks")
         verbose_name = _("scheduled task")
+        indexes = [
+            models.Index(fields=["next_run", "name"], name="schedule_nextrun")
+        ]
 
     def computeNextRun(self, now=None):
         if now: